@@ -7,18 +7,26 @@ called LCAFunc. Such a function represents a function
 from a LCA G to the complex numbers C.
 """
 from operator import itemgetter
+import operator
 from sympy import Matrix, Float, Integer, Add, Rational
 from abelian.linalg import solvers, free_to_free
 from abelian.linalg.utils import norm, difference
-from abelian.linalg.free_to_free import elements_increasing_norm
 from abelian.linalg.solvers import solve
 from abelian.utils import call_nested_list, verify_dims_list, copy_func, function_to_table
+from abelian.utils import matrix_to_array, elements_increasing_norm_array
 from abelian.groups import LCA
 from types import FunctionType
 from collections.abc import Callable
-import numpy as np
 import functools
-import operator
+from collections import namedtuple
+import numpy as np
+
+# SciPy is optional, its FFT routines are multithreaded and may overwrite
+# the input. If SciPy is not available, the NumPy FFT routines are used.
+try:
+    from scipy import fft as spfft
+except ImportError:
+    spfft = None
 
 
 class LCAFunc(Callable):
@@ -26,6 +34,12 @@ class LCAFunc(Callable):
     A function from an LCA to a complex number.
     """
 
+    # Functions are evaluated in tight loops, slots make the attribute
+    # lookups faster and keep the instances small
+    __slots__ = ('domain', 'representation', 'table', '_domain_length',
+                 '_is_fga', '_orders_arr', '_project', '_fft_scratch',
+                 '_from_table')
+
     def __init__(self, representation, domain):
         """
         Initialize a function G -> C.
@@ -86,11 +100,24 @@ class LCAFunc(Callable):
 
         self.domain = domain
 
+        # Cache properties of the domain used when evaluating the function
+        self._domain_length = domain.length()
+        self._project = domain.project_element
+        self._is_fga = domain.is_FGA()
+        self._orders_arr = np.array([int(p) for p in domain.orders],
+                                    dtype=np.int64)
+
+        # A table computed by _fft_wrapper on a numpy grid, with the
+        # func_type used. It is not stored as the table of the function,
+        # since it may differ from the values computed using pure python
+        self._fft_scratch = None
+
         # A function representation has been passed
-        if isinstance(representation, FunctionType):
+        if callable(representation):
             # A function representation has been passed
             self.representation = representation
             self.table = None
+            self._from_table = False
 
         # A table representation has been passed
         else:
@@ -103,13 +130,23 @@ class LCAFunc(Callable):
             if not verify_dims_list(representation, self.domain.orders):
                 raise ValueError('Table dimension mismatch.')
 
-            # Return a callable data table
-            def list_caller(list_of_points):
-                return call_nested_list(representation, list_of_points)
+            # Return a callable data table, NumPy arrays are indexed
+            # directly instead of one axis at a time
+            if isinstance(representation, np.ndarray):
+                def list_caller(list_of_points):
+                    index = tuple(int(k) for k in list_of_points)
+                    return representation[index]
+            else:
+                def list_caller(list_of_points):
+                    return call_nested_list(representation, list_of_points)
 
             self.representation = list_caller
             self.table = representation
 
+            # Whether the function is defined by its table, as opposed to
+            # a table computed and stored by to_table()
+            self._from_table = True
+
 
     def __call__(self, list_arg, *args, **kwargs):
         """
@@ -131,6 +168,49 @@ class LCAFunc(Callable):
         str = r'LCAFunc on domain {}'.format(self.domain)
         return str
 
+    def convolve(self, other):
+        """
+        Return the convolution of `self` and `other`.
+
+        The convolution is defined as
+        :math:`(f * g)(x) = \\sum_{y \\in G} f(y) g(x - y)`,
+        and is computed using the convolution theorem, i.e. by taking the
+        DFT of both functions, multiplying pointwise and taking the inverse
+        DFT. This requires O(N log N) operations instead of O(N^2), where N
+        is the number of elements in the domain.
+
+        Parameters
+        ----------
+        other : LCAFunc
+            Another function on the same domain, which must be discrete and
+            of finite order.
+
+        Returns
+        -------
+        function : LCAFunc
+            The convolution of `self` and `other`.
+
+        Examples
+        --------
+        >>> from abelian import LCA, LCAFunc
+        >>> import numpy as np
+        >>> domain = LCA([5])
+        >>> f = LCAFunc([1, 2, 0, 0, 0], domain)
+        >>> g = LCAFunc([0, 1, 0, 0, 3], domain)
+        >>> convolution = f.convolve(g)
+        >>> np.allclose(convolution.to_table(), [6, 1, 2, 0, 3])
+        True
+        """
+        if self.domain != other.domain:
+            raise ValueError('Domains must be equal.')
+
+        if not self._discrete_finite_domain():
+            raise TypeError('Domain must be discrete and finite.')
+
+        # Convolution theorem, (f * g) = IDFT(DFT(f) DFT(g))
+        dft_product = self.dft().pointwise(other.dft(), operator.mul)
+        return dft_product.idft()
+
     def copy(self):
         """
         Return a copy of the instance.
@@ -148,7 +228,9 @@ class LCAFunc(Callable):
         >>> f([1]) == g([1])
         True
         """
-        repr = copy_func(self.representation)
+        repr = self.representation
+        if isinstance(repr, FunctionType):
+            repr = copy_func(repr)
         domain = self.domain.copy()
         return type(self)(representation = repr, domain = domain)
 
@@ -160,13 +242,21 @@ class LCAFunc(Callable):
         This method uses the n-dimensional Fast Fourier Transform (FFT) to
         compute the n-dimensional Discrete Fourier Transform. The data is
         converted to a :py:class:`~numpy.ndarray` object for efficient
-        numerical computation, then the :py:func:`~numpy.fft.fftn` function
-        is used to compute the fast fourier transform.
+        numerical computation, then :py:func:`scipy.fft.fftn` is used to
+        compute the fast fourier transform, or :py:func:`~numpy.fft.fftn`
+        if SciPy is not installed. If the function values are real, only
+        half of the spectrum is computed using ``rfftn``, and the other
+        half is found from the Hermitian symmetry of the DFT.
 
-        This implementation is different from the implementation in
-        :py:func:`~numpy.fft.fftn` by a factor. While the :py:func:`~numpy.fft.fftn`
-        function divides by m*n on the inverse transform, this implementation
-        does it on the forward transform, and vice verca.
+        This implementation uses the same scaling as
+        :py:func:`~numpy.fft.fftn`, i.e. the forward transform is not
+        scaled and the inverse transform divides by the number of elements
+        in the domain.
+
+        The speed of the FFT depends on the orders of the domain. Orders
+        which are products of small primes are fastest, large prime orders
+        are slower but still O(N log N). The table is never zero-padded to
+        a faster length, since the padded transform is a different DFT.
 
 
         Parameters
@@ -174,7 +264,7 @@ class LCAFunc(Callable):
         func_type : str
             If None, compute the function values using pure python.
             If 'ogrid', use a numpy.ogrid (open mesh-grid) to compute the
-            functino values.
+            function values.
             If 'mgrid', use a numpy.mgrid (dense mesh-grid) to compute the
             function values.
 
@@ -251,7 +341,7 @@ class LCAFunc(Callable):
         # If the domain consists of more than one group in the direct sum,
         # the argument must have the same length. If the direct sum consists
         # of one group only and the argument is numeric, we forgive the user
-        domain_length = self.domain.length()
+        domain_length = self._domain_length
 
         # Verify the inputs
         if domain_length > 1:
@@ -265,7 +355,7 @@ class LCAFunc(Callable):
             raise ValueError('LCAFunc argument does not match domain length.')
 
         # Project and compute
-        proj_args = self.domain.project_element(list_arg)
+        proj_args = self._project(list_arg)
         answer = self.representation(proj_args, *args, **kwargs)
 
         # Cast to Python data type
@@ -281,14 +371,16 @@ class LCAFunc(Callable):
         """
         If the domain allows it, compute inv DFT.
 
-        This is a wrapper around np.fft.ifftn.
+        This is a wrapper around scipy.fft.ifftn, or np.fft.ifftn if SciPy
+        is not installed. Real function values use the same half-spectrum
+        computation as :py:meth:`~abelian.functions.LCAFunc.dft`.
 
         Parameters
         ----------
         func_type : str
             If None, compute the function values using pure python.
             If 'ogrid', use a numpy.ogrid (open mesh-grid) to compute the
-            functino values.
+            function values.
             If 'mgrid', use a numpy.mgrid (dense mesh-grid) to compute the
             function values.
 
@@ -349,10 +441,36 @@ class LCAFunc(Callable):
         >>> pointwise_mul.sample(sample_points) # i * 2*i = 2*i*i
         [0, 2, 8, 18, 32]
 
+        If both functions are represented by NumPy tables and the operator
+        is a NumPy ufunc or an arithmetic operator from the operator module,
+        it is applied to the tables directly.
+
+        >>> import numpy as np
+        >>> function1 = LCAFunc(np.arange(5), domain)
+        >>> function2 = LCAFunc(np.arange(5) * 2, domain)
+        >>> function1.pointwise(function2, mul).to_table()
+        array([ 0,  2,  8, 18, 32])
         """
         if self.domain != other.domain:
             raise ValueError('Domains must be equal.')
 
+        # If both functions are tables, apply an element-wise operator on
+        # the tables. Tables stored by to_table() are not used, since the
+        # function might have been tabulated using other arguments
+        elementwise = (isinstance(operator, np.ufunc) or
+                       operator in _elementwise_operators)
+        if (elementwise and self._from_table and other._from_table and
+                isinstance(self.table, np.ndarray) and
+                isinstance(other.table, np.ndarray)):
+            try:
+                new_table = operator(self.table, other.table)
+            except Exception:
+                new_table = None
+            if isinstance(new_table, np.ndarray) and \
+                    new_table.shape == self.table.shape:
+                return type(self)(domain = self.domain,
+                                  representation = new_table)
+
         # Perform both function and apply the operator
         def new_repr(list_arg, *args, **kwargs):
             result_self = self.representation(list_arg, *args, **kwargs)
@@ -414,18 +532,13 @@ class LCAFunc(Callable):
         # Get the domain for the new function
         domain = morphism.source
 
-        def new_repr(list_arg, *args, **kwargs):
-            """
-            A function which first applies the morphism,
-            then applies the function.
-            """
-            applied_morph = morphism.evaluate(list_arg)
-            applied_func = self.representation(applied_morph, *args, **kwargs)
-            return applied_func
+        # First apply the morphism, then the function
+        op = _CompiledRepr.pullback_op(morphism)
+        new_repr = _CompiledRepr.prepend(self.representation, op)
 
         return type(self)(representation = new_repr, domain = domain)
 
-    def pushforward(self, morphism, terms_in_sum = 50):
+    def pushforward(self, morphism, terms_in_sum = 50, norm_condition = None):
         """
         Return the pushforward along `morphism`.
 
@@ -446,6 +559,7 @@ class LCAFunc(Callable):
             The norm_condition must be a function of a group element,
             and when the function is false for every v in the kernel
             such that maxnorm(v) = C for a given C, then the sum terminates.
+            An example is ``lambda x: sum(abs(x_j) for x_j in x) <= 10``.
 
 
         Returns
@@ -465,7 +579,7 @@ class LCAFunc(Callable):
         >>> func_expr = lambda x: 2**-sum(x_j**2 for x_j in x)
         >>> func = LCAFunc(func_expr, domain = R)
         >>> func.pushforward(epimorphism, 1)([0]) # 1 term in the sum
-        1.0
+        1
         >>> func.pushforward(epimorphism, 3)([0]) # 1 + 0.5*2
         2.0
         >>> func.pushforward(epimorphism, 5)([0]) # 1 + 0.5*2 + 0.0625*2
@@ -480,9 +594,13 @@ class LCAFunc(Callable):
         >>> func_expr = lambda x: 2**-sum(x_j**2 for x_j in x)
         >>> func = LCAFunc(func_expr, domain = Z)
         >>> func.pushforward(epimorphism, 1)([0]) # 1 term in the sum
-        1.0
+        1
         >>> func.pushforward(epimorphism, 3)([0]) # 1 + 0.5*2 + 0.0625*2
         1.125
+        >>> # Terminate the sum when |x| > 2 for every x = 2k with |k| = C
+        >>> cond = lambda x: abs(x[0]) <= 2
+        >>> func.pushforward(epimorphism, norm_condition = cond)([0])
+        1.125
 
         The third example is a homomorphism R -> R.
 
@@ -492,7 +610,7 @@ class LCAFunc(Callable):
         >>> func_expr = lambda x: 2**-sum(x_j**2 for x_j in x)
         >>> func = LCAFunc(func_expr, domain = R)
         >>> func.pushforward(epimorphism, 3)([0]) # 1 term in the sum
-        1.0
+        1
 
 
         """
@@ -507,39 +625,129 @@ class LCAFunc(Callable):
         # Get the domain for the new function
         domain = morphism.target
 
+        # The same elements are often evaluated several times, e.g. when
+        # sampling or computing a table, so the solutions are cached
+        target_orders = Matrix(morphism.target.orders)
+
+        # If the morphism is an integer epimorphism from a free group,
+        # phi(x) = e_i is solved once for every unit vector e_i. The
+        # columns form an inverse B with A * B = I mod p, so phi(x) = y is
+        # solved by x = B * y for every integer y using integer arithmetic
+        inverse = None
+        source = morphism.source
+        integer_matrix = matrix_to_array(morphism.A).dtype != object
+        kernel_basis = matrix_to_array(kernel.A)
+        if (integer_matrix and all(source.discrete) and
+                source._all_inf_order and kernel_basis.dtype != object):
+            unit_vectors = Matrix.eye(morphism.A.rows)
+            columns = [solve(morphism.A, unit_vectors[:, i], target_orders)
+                       for i in range(morphism.A.rows)]
+            if all(column is not None for column in columns):
+                inverse = np.array([[int(entry) for entry in column]
+                                    for column in columns],
+                                   dtype=np.int64).T.reshape(
+                    morphism.A.cols, morphism.A.rows)
+
+        # The solution B * y may be far from the origin, while the sum is
+        # over x + K * c for the linear combinations c with the smallest
+        # max-norms. The solution is moved within its coset of the kernel
+        # so that its coordinates in the kernel basis K are rounded to zero,
+        # then the linear combinations c are centered on the origin
+        center_solution = None
+        if inverse is not None and kernel_n > 0:
+            kernel_pinv = np.linalg.pinv(kernel_basis.astype(float))
+
+            def center_solution(x):
+                """
+                Return x - K * c, where c is the rounded coordinates of x.
+                """
+                coeffs = np.rint(kernel_pinv @ x).astype(np.int64)
+                return x - kernel_basis @ coeffs
+
+        @functools.lru_cache(maxsize=4096)
+        def base_solution(element):
+            """
+            Compute and cache a solution to phi(x) = element.
+            """
+            if inverse is not None and all(isinstance(e, _integer_types)
+                                           for e in element):
+                base_ans = inverse @ np.array(element, dtype=np.int64)
+                if center_solution is not None:
+                    base_ans = center_solution(base_ans)
+                base_ans.flags.writeable = False
+                return base_ans
+
+            base_ans = solve(morphism.A, Matrix(element), target_orders)
+            base_ans = matrix_to_array(base_ans).ravel()
+            base_ans.flags.writeable = False
+            return base_ans
+
+        # The kernel elements in the sum do not depend on the argument of
+        # the new function, so they are computed once. The linear
+        # combinations of the kernel columns are ordered by increasing
+        # max-norm, and the kernel elements are projected to the source
+        if terms_in_sum > 1 and kernel_n > 0:
+            linear_combs = elements_increasing_norm_array(kernel_n,
+                                                          terms_in_sum)
+            kernel_elements = linear_combs @ matrix_to_array(kernel.A).T
+
+            orders = np.array([int(p) for p in kernel.target.orders])
+            periodic = orders > 0
+            kernel_elements = np.where(periodic, kernel_elements %
+                                       np.where(periodic, orders, 1),
+                                       kernel_elements)
+
+            # The max-norm C of every linear combination, and whether
+            # any linear combination has max-norm C
+            maxnorms = np.abs(linear_combs).max(axis=1)
+            maxnorm_used = np.bincount(maxnorms) > 0
+
+        def truncate(kernel_points):
+            """
+            Remove every kernel point from the first value C of the max-norm
+            such that the norm condition is false for all the points.
+            """
+            condition = [bool(norm_condition(point)) for point in
+                         kernel_points.tolist()]
+            condition = np.array(condition, dtype=bool)
+
+            # Find the values of C which have no points satisfying the
+            # condition, the sum terminates at the first one
+            maxnorm_alive = np.bincount(maxnorms, weights=condition,
+                                        minlength=len(maxnorm_used)) > 0
+            terminate_at = np.flatnonzero(maxnorm_used & ~maxnorm_alive)
+            if len(terminate_at) == 0:
+                return kernel_points
+            return kernel_points[maxnorms < terminate_at[0]]
+
         def new_representation(list_arg, *args, **kwargs):
             """
             A function which first applies the morphism,
             then applies the function.
             """
             # Compute a solution to phi(x) = y
-            target_orders = Matrix(morphism.target.orders)
-            base_ans = solve(morphism.A, Matrix(list_arg), target_orders)
-            
-            # If only one term is to be used, evaluate and return
-            if terms_in_sum == 1:
-                return self.representation(base_ans, *args, **kwargs)
-
-            # The kernel is empty, do not start summing, just return
-            if kernel_n == 0:
-                return self.representation(base_ans, *args, **kwargs)
+            base_ans = base_solution(tuple(list_arg))
+
+            # If only one term is to be used, or the kernel is empty, do not
+            # start summing, just evaluate and return. As before, the first
+            # term is always used, even if `terms_in_sum` is less than one
+            if terms_in_sum <= 1 or kernel_n == 0:
+                return self.representation(base_ans.tolist(), *args, **kwargs)
+
+            # The `base_ans` is in the kernel of the morphism,
+            # we move to all points in the kernel by adding
+            # the linear combinations of the kernel
+            kernel_points = base_ans + kernel_elements
+            if norm_condition is not None:
+                kernel_points = truncate(kernel_points)
+                if len(kernel_points) == 0:
+                    return 0
 
             # Iterate through the kernel space and compute the sum
+            function = self.representation
             kernel_sum = 0
-            dim_ker_source = len(kernel.source)
-
-            generator = elements_increasing_norm(dim_ker_source)
-            for counter, boundary_element in enumerate(generator, 1):
-                # The `base_ans` is in the kernel of the morphism,
-                # we move to all points in the kernel by taking
-                # the `base_ans` + linear combinations of the kernel
-                linear_comb = Matrix(boundary_element)
-                kernel_element = base_ans + kernel.evaluate(linear_comb)
-
-                function = self.representation
+            for kernel_element in kernel_points.tolist():
                 kernel_sum += function(kernel_element, *args, **kwargs)
-                if counter >= terms_in_sum:
-                    break
 
             return kernel_sum
 
@@ -550,6 +758,12 @@ class LCAFunc(Callable):
         """
         Sample on a list of group elements.
 
+        If the function is represented by a NumPy table, the table is
+        indexed with all the elements at once. Otherwise every element is
+        evaluated in turn, see
+        :py:meth:`~abelian.functions.LCAFunc.sample_array` to evaluate a
+        representation which accepts NumPy arrays on every element at once.
+
         Parameters
         ----------
         list_of_elements : list
@@ -568,9 +782,53 @@ class LCAFunc(Callable):
         >>> func.sample(sample_points)
         [0, 3, 3, 6]
         """
+        if not args and not kwargs:
+            sampled_vals = self._sample_table(list_of_elements)
+            if sampled_vals is not None:
+                return sampled_vals.tolist()
 
         return [self.evaluate(p, *args, **kwargs) for p in list_of_elements]
 
+    def sample_array(self, points, *args, **kwargs):
+        """
+        Sample on an array of group elements.
+
+        Every element is projected onto the domain in one vectorized
+        operation, then the representation is called once with a list of
+        arrays, one array for every coordinate. If the representation does
+        not accept NumPy arrays, the elements are evaluated one by one. The
+        representation must act element-wise on the arrays, a function
+        which reduces over them, e.g. using np.max, gives wrong values.
+
+        Parameters
+        ----------
+        points : :py:class:`~numpy.ndarray` or list
+            An array of shape (N, d), where every row is a group element
+            and d is the length of the domain. If d is 1, an array of
+            shape (N,) may also be used.
+
+        Returns
+        -------
+        sampled_vals : :py:class:`~numpy.ndarray`
+            An array of shape (N,) with the sampled values.
+
+        Examples
+        --------
+        >>> from abelian import LCAFunc, LCA
+        >>> import numpy as np
+        >>> func = LCAFunc(lambda x : x[0] * x[1], LCA([5, 0]))
+        >>> points = np.array([[1, 2], [6, 3], [4, -1]])
+        >>> func.sample_array(points).tolist()
+        [2, 3, -4]
+        """
+        sampled_vals = self._sample_vectorized(points, *args, **kwargs)
+        if sampled_vals is not None:
+            return np.array(sampled_vals)
+
+        points = np.asarray(points).reshape(-1, self._domain_length)
+        return np.array([self.evaluate(p, *args, **kwargs)
+                         for p in points.tolist()])
+
 
     def shift(self, list_shift):
         """
@@ -595,19 +853,31 @@ class LCAFunc(Callable):
         [0, 1, 2, 3]
         >>> func.shift([2]).sample([0, 1, 2, 3])
         [-2, -1, 0, 1]
+
+        A function with a table on a finite domain is shifted by rolling
+        the table.
+
+        >>> import numpy as np
+        >>> func = LCAFunc(np.arange(5), LCA([5]))
+        >>> func.shift([2]).to_table()
+        array([3, 4, 0, 1, 2])
         """
         new_domain = self.domain
 
-        def new_representation(list_arg, *args, **kwargs):
-            """
-            A function which first applies the morphism,
-            then applies the function.
-            """
-            generator = zip(list_arg, list_shift)
-            shifted_arg = [arg-shift for (arg, shift) in generator]
-            applied_func = self.representation(shifted_arg, *args, **kwargs)
-            return applied_func
-
+        # Rolling the table gives table[x - shift] at every x. A table
+        # stored by to_table() is not rolled, the function is shifted
+        table = self.table
+        integer_shift = all(isinstance(s, _integer_types) for s in list_shift)
+        if (self._from_table and isinstance(table, np.ndarray) and
+                self._discrete_finite_domain() and integer_shift and
+                len(list_shift) == self._domain_length):
+            new_table = np.roll(table, shift = [int(s) for s in list_shift],
+                                axis = tuple(range(len(list_shift))))
+            return type(self)(representation = new_table, domain = new_domain)
+
+        # First shift the argument, then apply the function
+        op = _Op('shift', list(list_shift))
+        new_representation = _CompiledRepr.prepend(self.representation, op)
 
         return type(self)(representation = new_representation,
                           domain = new_domain)
@@ -632,10 +902,16 @@ class LCAFunc(Callable):
         """
         Return a n-dimensional table.
 
+        If the function is not represented by a table, the function is
+        evaluated on every element of the domain and the result is stored,
+        so the work is only done once.
+
         Returns
         -------
-        table : n-dimensional list
-            The table representation.
+        table : n-dimensional list or :py:class:`~numpy.ndarray`
+            The table representation. If the function was not initialized
+            with a table, this is a contiguous complex
+            :py:class:`~numpy.ndarray`.
 
         Examples
         --------
@@ -672,7 +948,7 @@ class LCAFunc(Callable):
 
         # If a table is not computed, compute it and return
         dims = self.domain.orders
-        table = function_to_table(self.representation, dims, *args, **kwargs)
+        table = self._build_table_vectorized(dims, *args, **kwargs)
         self.table = table
         return table
 
@@ -723,21 +999,52 @@ class LCAFunc(Callable):
         if not transversal_rule:
             transversal_rule = voronoi(epimorphism, norm_p = 2)
 
-        def new_representation(list_arg, *args, **kwargs):
-            # Compose (section * transversal)(x)
-            applied_epi = epimorphism.evaluate(list_arg)
-            composed = transversal_rule(applied_epi)
-
-            # If the composition is the identity, apply the epimorphism
-            # and then the function to evaluate the new function at the point
-            epsilon = 10e-10
-            if difference(composed,list_arg) < epsilon:#composed == list_arg:
-                return self.representation(applied_epi, *args, **kwargs)
-            else:
-                return default_value
+        # Apply the epimorphism if (transversal * epimorphism)(x) = x,
+        # otherwise the default value is returned
+        op = _Op('transversal', (epimorphism, transversal_rule,
+                                 default_value))
+        new_representation = _CompiledRepr.prepend(self.representation, op)
 
         return type(self)(representation=new_representation, domain=new_domain)
 
+    def _build_table_vectorized(self, dims, *args, grid = None, **kwargs):
+        """
+        Evaluate the representation on every element of Z_`dims`.
+
+        If `grid` is given, the representation is first called once with a
+        list of arrays from a numpy.ogrid or numpy.mgrid, so that NumPy
+        broadcasting computes every function value, see
+        https://arxiv.org/pdf/1102.1523.pdf. If the representation does not
+        accept arrays, or returns something which is not a numeric array of
+        the correct shape, every element is evaluated using pure python
+        instead. A function which reduces over its argument may still pass
+        these checks, so the grid is only used if it is asked for.
+
+        Parameters
+        ----------
+        dims : list
+            A list of dimensions such as [8, 6, 3].
+        grid : str
+            Either None (pure python), 'ogrid' (open mesh-grid) or 'mgrid'
+            (dense mesh-grid).
+
+        Returns
+        -------
+        table : :py:class:`~numpy.ndarray`
+            A contiguous complex array of shape `dims`.
+        """
+        dims = tuple(int(k) for k in dims)
+        if grid is not None:
+            grids = list(getattr(np, grid)[tuple(slice(0, k) for k in dims)])
+
+            last = [k - 1 for k in dims]
+            table = _vectorized_call(self.representation, grids, dims, last,
+                                     *args, **kwargs)
+            if table is not None:
+                return np.array(table, dtype=np.complex128)
+
+        return function_to_table(self.representation, dims, *args, **kwargs)
+
     def _discrete_finite_domain(self):
         """
         Whether or not the domain is discrete and of finite order.
@@ -747,10 +1054,10 @@ class LCAFunc(Callable):
         discrete_finite : bool
             Whether or not the domain is discrete and finite.
         """
-        return self.domain.is_FGA() and all(p > 0 for p in self.domain.orders)
+        return self._is_fga and all(p > 0 for p in self.domain.orders)
 
 
-    def _fft_wrapper(self, func_to_wrap = 'fftn', func_type = ''):
+    def _fft_wrapper(self, func_to_wrap = 'fftn', func_type = None):
         """
         Common wrapper for FFT and IFFT routines.
 
@@ -768,11 +1075,12 @@ class LCAFunc(Callable):
         Parameters
         ----------
         func_to_wrap : str
-            Name of the function from the np.fft library to call.
+            Name of the function from the scipy.fft library to call. If
+            SciPy is not installed, the function from np.fft is used.
         func_type : str
-            If empty, compute the function values using pure python.
+            If None, compute the function values using pure python.
             If 'ogrid', use a numpy.ogrid (open mesh-grid) to compute the
-            functino values.
+            function values.
             If 'mgrid', use a numpy.mgrid (dense mesh-grid) to compute the
             function values.
 
@@ -787,37 +1095,450 @@ class LCAFunc(Callable):
         # Verify that the inputs are sensible
         domain = self.domain
         dims = domain.orders
-        if not all(p > 0 for p in dims) and domain.is_FGA():
-            return ValueError('Domain must be discrete and of finite order.')
+        if not self._discrete_finite_domain():
+            raise TypeError('No table. Domain must be discrete and finite.')
 
-        # Put the function values in a table in preparation for FFT/IFFT
-        if func_type is None:
+        if func_type not in (None, 'ogrid', 'mgrid'):
+            raise ValueError('func_type must be None, ogrid or mgrid.')
+
+        # Put the function values in a table in preparation for FFT/IFFT.
+        # Tables which are computed are kept, so that computing both the
+        # DFT and the inverse DFT only evaluates the function once. A table
+        # computed on a grid is only reused for the same func_type
+        if self.table is not None:
+            table = np.asarray(self.table)
+            temporary = table is not self.table
+        elif func_type is None:
             table = self.to_table()
+            temporary = False
+        else:
+            if self._fft_scratch is None or self._fft_scratch[0] != func_type:
+                table = self._build_table_vectorized(dims, grid=func_type)
+                self._fft_scratch = (func_type, table)
+            table = self._fft_scratch[1]
+            temporary = False
+
+        # Take fft, the result is an ndarray which is used directly as table
+        assert isinstance(table, np.ndarray)
+        if spfft is not None:
+            fft_module, fft_kwargs = spfft, {'workers': -1}
+        else:
+            fft_module, fft_kwargs = np.fft, {}
+
+        # A complex table with no imaginary part, e.g. the table of a real
+        # function, is transformed as a real table. Only half of the
+        # spectrum is computed, the rest is found from the Hermitian symmetry
+        if (table.dtype.kind == 'c' and func_to_wrap in ('fftn', 'ifftn') and
+                not table.imag.any()):
+            table = table.real
+
+        # The scaling of the FFT library is kept, i.e. the inverse transform
+        # divides by prod(dims), so no extra pass over the table is needed
+        real_table = table.ndim > 0 and table.dtype.kind in 'biuf'
+        if real_table and func_to_wrap in ('fftn', 'ifftn'):
+            # Only half of the spectrum is computed
+            half_spectrum = fft_module.rfftn(table, **fft_kwargs)
+            table_computed = _hermitian_expand(half_spectrum, table.shape)
+
+            # For real x, ifftn(x) = conj(fftn(x)) / prod(dims)
+            if func_to_wrap == 'ifftn':
+                np.conjugate(table_computed, out=table_computed)
+                table_computed /= table.size
         else:
-            # Here the np.ogrid or np.mgrid can be used, see
-            # https://arxiv.org/pdf/1102.1523.pdf
-            function = getattr(np, func_type)
-            table = function([tuple([slice(k) for k in dims])])
-
-        # Take fft and convert to list of lists
-        function_wrapped = getattr(np.fft, func_to_wrap, None)
-        if function_wrapped is None:
-            raise ValueError('Could not wrap:', func_to_wrap)
-        table_computed = function_wrapped(table)
-
-        # Scale differently then the Numpy implementation
-        # Numpy divides by prod(dims) when computing the inverse,
-        # but we do it when we compute the forward transform
-        if func_to_wrap == 'fftn':
-            table_computed =  table_computed
-                          #/ (functools.reduce(operator.mul, dims))
-        elif func_to_wrap == 'ifftn':
-            table_computed =  table_computed
-            #* (functools.reduce(operator.mul, dims))
+            function_wrapped = getattr(fft_module, func_to_wrap, None)
+            if function_wrapped is None:
+                raise ValueError('Could not wrap:', func_to_wrap)
+
+            # Overwrite the input if it is not stored on the instance
+            # (e.g. a converted list of lists)
+            if spfft is not None:
+                fft_kwargs['overwrite_x'] = temporary
+            table_computed = function_wrapped(table, **fft_kwargs)
 
         # Create a new instance and return
         return type(self)(domain = domain, representation = table_computed)
 
+    def _project_points(self, points):
+        """
+        Project an array of group elements onto the domain.
+
+        Parameters
+        ----------
+        points : :py:class:`~numpy.ndarray` or list
+            An array of shape (N, d) or (N,), see
+            :py:meth:`~abelian.functions.LCAFunc.sample_array`.
+
+        Returns
+        -------
+        projected : :py:class:`~numpy.ndarray` or None
+            An array of shape (N, d), or None if the elements can not be
+            projected in one vectorized operation.
+        """
+        if self._domain_length == 0:
+            return None
+
+        try:
+            points = np.asarray(points)
+        except ValueError:
+            return None
+
+        # An array (N,) is forgiven if the domain has length 1
+        if points.ndim == 1 and self._domain_length == 1:
+            points = points.reshape(-1, 1)
+        if points.ndim != 2 or points.shape[1] != self._domain_length:
+            return None
+        if len(points) == 0:
+            return None
+
+        # Non-integers cannot be projected to discrete groups, leave it to
+        # the element-wise evaluation to raise the error
+        if points.dtype.kind == 'f' and any(self.domain.discrete):
+            return None
+        if points.dtype.kind not in 'iuf':
+            return None
+
+        # Project every element onto the domain, a % 0 = a
+        orders = self._orders_arr
+        periodic = orders > 0
+        return np.where(periodic, points % np.where(periodic, orders, 1),
+                        points)
+
+    def _sample_table(self, points):
+        """
+        Sample a NumPy table by indexing it with every element at once.
+
+        Parameters
+        ----------
+        points : :py:class:`~numpy.ndarray` or list
+            An array of shape (N, d) or (N,), see
+            :py:meth:`~abelian.functions.LCAFunc.sample_array`.
+
+        Returns
+        -------
+        sampled_vals : :py:class:`~numpy.ndarray` or None
+            An array of shape (N,), or None if the function is not
+            represented by a NumPy table on a finite discrete domain.
+        """
+        # A table stored by to_table() may be computed using other
+        # arguments, and is complex, so it is not sampled
+        table = self.table
+        if not (self._from_table and isinstance(table, np.ndarray) and
+                self._discrete_finite_domain() and
+                table.shape == tuple(self._orders_arr)):
+            return None
+
+        projected = self._project_points(points)
+        if projected is None or projected.dtype.kind not in 'iu':
+            return None
+        return table[tuple(projected.T)]
+
+    def _sample_vectorized(self, points, *args, **kwargs):
+        """
+        Sample on an array of group elements using NumPy broadcasting.
+
+        Parameters
+        ----------
+        points : :py:class:`~numpy.ndarray` or list
+            An array of shape (N, d) or (N,), see
+            :py:meth:`~abelian.functions.LCAFunc.sample_array`.
+
+        Returns
+        -------
+        sampled_vals : :py:class:`~numpy.ndarray` or None
+            An array of shape (N,), or None if the elements or the
+            representation do not allow a vectorized evaluation.
+        """
+        # A table on a finite discrete domain, e.g. after a DFT, is indexed
+        # directly with the projected elements
+        if not args and not kwargs:
+            sampled_vals = self._sample_table(points)
+            if sampled_vals is not None:
+                return sampled_vals
+
+        projected = self._project_points(points)
+        if projected is None:
+            return None
+
+        return _vectorized_call(self.representation, list(projected.T),
+                                (len(projected),), projected[-1].tolist(),
+                                *args, **kwargs)
+
+
+class _CompiledRepr(object):
+    """
+    A representation which transforms the argument, then calls another one.
+
+    The functions returned by :py:meth:`~abelian.functions.LCAFunc.shift`,
+    :py:meth:`~abelian.functions.LCAFunc.pullback` and
+    :py:meth:`~abelian.functions.LCAFunc.transversal` share one instance
+    with a list of operations, instead of wrapping the previous
+    representation in a new closure every time. Consecutive shifts are
+    added together, and consecutive pullbacks are composed, so a chain of
+    them is applied as one operation. The operations are `_Op` tuples
+    (kind, payload):
+
+    * ('shift', list_shift) : x -> x - list_shift
+    * ('pullback', (morphism, A, rows)) : x -> morphism(x), where A is the
+      matrix of the morphism as a numpy array. If the morphism is an
+      integer matrix between discrete groups, rows is the matrix as a list
+      of lists of ints, used to apply it without SymPy, and None otherwise
+    * ('transversal', (epimorphism, rule, default)) : x -> epimorphism(x)
+      if rule(epimorphism(x)) = x, else the value `default` is returned
+
+    The operations are fused when they are prepended, so there is no
+    separate compilation step. :py:meth:`~abelian.functions.LCAFunc.pointwise`
+    is not an operation, since it combines two representations instead of
+    transforming the argument of one, and it remains a closure.
+    """
+
+    __slots__ = ('base', 'ops')
+
+    def __init__(self, base, ops):
+        """
+        Initialize a representation x -> base(ops(x)).
+
+        Parameters
+        ----------
+        base : function
+            A representation with signature `(list_arg, *args, **kwargs)`.
+        ops : list
+            Operations, applied to the argument in order.
+        """
+        self.base = base
+        self.ops = tuple(ops)
+
+    def __call__(self, list_arg, *args, **kwargs):
+        """
+        Apply the operations to `list_arg`, then the base representation.
+        """
+        arrays = any(isinstance(arg, np.ndarray) for arg in list_arg)
+
+        for kind, payload in self.ops:
+            if kind == 'shift':
+                generator = zip(list_arg, payload)
+                list_arg = [arg - shift for (arg, shift) in generator]
+
+            elif kind == 'pullback':
+                morphism, A, rows = payload
+                if arrays:
+                    list_arg = self._evaluate_on_arrays(morphism, A, list_arg)
+                elif rows is not None:
+                    list_arg = self._evaluate_on_list(morphism, rows, list_arg)
+                else:
+                    list_arg = morphism.evaluate(list_arg)
+
+            elif kind == 'transversal':
+                if arrays:
+                    raise TypeError('Transversal rules take one element.')
+
+                # Compose (section * transversal)(x)
+                epimorphism, transversal_rule, default_value = payload
+                applied_epi = epimorphism.evaluate(list_arg)
+                composed = transversal_rule(applied_epi)
+
+                # If the composition is the identity, apply the epimorphism
+                # and then the function to evaluate the new function
+                epsilon = 10e-10
+                if not difference(composed, list_arg) < epsilon:
+                    return default_value
+                list_arg = applied_epi
+
+        return self.base(list_arg, *args, **kwargs)
+
+    @classmethod
+    def prepend(cls, representation, op):
+        """
+        Return the representation x -> representation(op(x)).
+
+        Parameters
+        ----------
+        representation : function
+            A representation with signature `(list_arg, *args, **kwargs)`.
+        op : tuple
+            The operation to apply first.
+
+        Returns
+        -------
+        representation : _CompiledRepr
+            The new representation.
+        """
+        if not isinstance(representation, cls):
+            return cls(representation, [op])
+
+        ops = list(representation.ops)
+        kind, payload = op
+        first_kind, first_payload = ops[0]
+
+        if kind == first_kind == 'shift':
+            generator = zip(payload, first_payload)
+            ops[0] = _Op('shift', [a + b for (a, b) in generator])
+        elif kind == first_kind == 'pullback':
+            ops[0] = cls.pullback_op(first_payload[0] * payload[0])
+        else:
+            ops.insert(0, op)
+
+        return cls(representation.base, ops)
+
+    @staticmethod
+    def pullback_op(morphism):
+        """
+        Return the operation which applies `morphism`.
+        """
+        A = matrix_to_array(morphism.A)
+        discrete = all(morphism.source.discrete + morphism.target.discrete)
+        if A.dtype == object or A.size == 0 or not discrete:
+            return _Op('pullback', (morphism, A, None))
+        return _Op('pullback', (morphism, A, A.tolist()))
+
+    @staticmethod
+    def _evaluate_on_list(morphism, rows, list_arg):
+        """
+        Apply a morphism with an integer matrix to an element.
+        """
+        source, target = morphism.source, morphism.target
+        element = [int(e) for e in source.project_element(list_arg)]
+        evaluated = [sum(a * e for (a, e) in zip(row, element))
+                     for row in rows]
+        return [v % int(p) if p else v
+                for (v, p) in zip(evaluated, target.orders)]
+
+    @staticmethod
+    def _evaluate_on_arrays(morphism, A, arrays):
+        """
+        Apply a morphism with an integer matrix to a list of arrays.
+        """
+        m, n = A.shape
+        if A.dtype == object or n == 0:
+            raise TypeError('Only integer matrices are applied to arrays.')
+
+        source, target = morphism.source, morphism.target
+        arrays = _project_arrays(source, arrays)
+        evaluated = [sum(A[i, j] * arrays[j] for j in range(n))
+                     for i in range(m)]
+        if target._all_inf_order:
+            return evaluated
+        return _project_arrays(target, evaluated)
+
+
+# An operation of a _CompiledRepr, see its documentation
+_Op = namedtuple('_Op', ['kind', 'payload'])
+
+
+# Binary operators which act element-wise on NumPy arrays
+_elementwise_operators = (operator.add, operator.sub, operator.mul,
+                          operator.truediv, operator.floordiv, operator.mod,
+                          operator.pow)
+
+
+# The types of the integer entries of group elements
+_integer_types = (int, Integer, np.integer)
+
+
+def _project_arrays(group, arrays):
+    """
+    Project a list of arrays, one for every coordinate, onto an LCA.
+
+    Parameters
+    ----------
+    group : LCA
+        The group to project onto.
+    arrays : list
+        A list of arrays, one for every group in the direct sum.
+
+    Returns
+    -------
+    arrays : list
+        The list of projected arrays.
+    """
+    if len(arrays) != len(group.orders):
+        raise ValueError('Length of element must match groups.')
+
+    projected = []
+    for (array, order, discrete) in zip(arrays, group.orders, group.discrete):
+        array = np.asarray(array)
+        if discrete and array.dtype.kind not in 'iu':
+            raise ValueError('Non-integer cannot be projected to '
+                             'discrete group.')
+        projected.append(array % int(order) if order else array)
+    return projected
+
+
+def _hermitian_expand(half_spectrum, dims):
+    """
+    Return the full DFT of a real table, given half of it.
+
+    The DFT X of a real table satisfies X[k] = conj(X[-k]), where the
+    indices are taken modulo `dims`. Functions such as
+    :py:func:`~numpy.fft.rfftn` only return the entries with
+    k_n <= dims[-1] // 2 in the last axis, and the others are found from
+    the symmetry.
+
+    Parameters
+    ----------
+    half_spectrum : :py:class:`~numpy.ndarray`
+        The output of an n-dimensional real FFT.
+    dims : tuple
+        The shape of the real table.
+
+    Returns
+    -------
+    spectrum : :py:class:`~numpy.ndarray`
+        The full complex spectrum, of shape `dims`.
+    """
+    n, h = dims[-1], half_spectrum.shape[-1]
+    spectrum = np.empty(dims, dtype=half_spectrum.dtype)
+    spectrum[..., :h] = half_spectrum
+
+    # The index k_n in [h, n) in the last axis maps to n - k_n in [1, n - h],
+    # and in every other axis the index k maps to -k mod the dimension
+    mirrored = half_spectrum[..., n - h:0:-1]
+    for axis, d in enumerate(dims[:-1]):
+        mirrored = np.take(mirrored, (-np.arange(d)) % d, axis=axis)
+    np.conjugate(mirrored, out=spectrum[..., h:])
+
+    return spectrum
+
+
+def _vectorized_call(function, arrays, shape, check_arg, *args, **kwargs):
+    """
+    Call a function on group elements with arrays instead of numbers.
+
+    Parameters
+    ----------
+    function : function
+        A function with signature `(list_arg, *args, **kwargs)`.
+    arrays : list
+        A list of arrays, one for every coordinate, which broadcast to
+        `shape`.
+    shape : tuple
+        The shape of the output.
+    check_arg : list
+        The group element at the last index of the output. The value
+        is compared against a call with numbers, to catch functions
+        which reduce over the arrays instead of broadcasting.
+
+    Returns
+    -------
+    values : :py:class:`~numpy.ndarray` or None
+        A numeric array with shape `shape`, or None if the function did
+        not produce one.
+    """
+    try:
+        with np.errstate(all='raise'):
+            values = function(arrays, *args, **kwargs)
+            values = np.broadcast_to(np.asarray(values), shape)
+        if values.dtype.kind not in 'biufc':
+            return None
+
+        expected = function(check_arg, *args, **kwargs)
+        last = tuple(k - 1 for k in shape)
+        if not np.isclose(values[last], complex(expected)):
+            return None
+    except Exception:
+        return None
+
+    return values
+
 
 def voronoi(epimorphism, norm_p=2):
     """
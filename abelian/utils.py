@@ -3,8 +3,10 @@
 
 import itertools
 import functools
+import math
 import types
 import numpy as np
+from sympy import Integer
 
 
 def mod(a, b):
@@ -120,8 +122,9 @@ def call_nested_list(list_of_lists, arg):
     return answer
 
 
-def function_to_table(function, dims, *args, **kwargs):
+def function_to_table(function, dims, *args, dtype = np.complex128, **kwargs):
     """
+    Evaluate a function on every element of Z_`dims` and return a table.
 
     Parameters
     ----------
@@ -129,20 +132,141 @@ def function_to_table(function, dims, *args, **kwargs):
         A function with signature `(list_arg, *args, **kwargs)`.
     dims : list
         A list of dimensions such as [8, 6, 3].
+    dtype : numpy.dtype
+        The data type of the table, complex by default.
 
     Returns
     -------
+    table : :py:class:`~numpy.ndarray`
+        A contiguous array of shape `dims`, where the entry at index
+        `(i, j, ...)` is the function evaluated at `[i, j, ...]`.
 
+    Examples
+    ---------
+    >>> table = function_to_table(lambda x: sum(x), [2, 3])
+    >>> table.shape
+    (2, 3)
+    >>> complex(table[1, 2])
+    (3+0j)
+    """
+
+    # Evaluate the function in C-order directly into an array, this avoids
+    # writing every value into the table by Python-level indexing
+    dims = tuple(dims)
+    values = (function(list(list_arg), *args, **kwargs)
+              for list_arg in itertools.product(*[range(d) for d in dims]))
+    count = math.prod(int(d) for d in dims)
+    table = np.fromiter(values, dtype=dtype, count=count)
+    return table.reshape(dims)
+
+
+def elements_increasing_norm_array(free_rank, count):
+    """
+    Return the first `count` elements of Z^r of increasing max-norm.
+
+    The elements are in the same order as the ones yielded by
+    :py:func:`~abelian.linalg.free_to_free.elements_increasing_norm`, but
+    every set of elements with equal max-norm is computed using NumPy.
+
+    Parameters
+    ----------
+    free_rank : int
+        The free rank (like dimension) of Z^r, i.e. free_rank = r.
+    count : int
+        The number of elements.
+
+    Returns
+    -------
+    elements : :py:class:`~numpy.ndarray`
+        An integer array of shape (count, free_rank).
+
+    Examples
+    ---------
+    >>> elements_increasing_norm_array(2, 5).tolist()
+    [[0, 0], [1, -1], [-1, -1], [1, 0], [-1, 0]]
+    >>> elements_increasing_norm_array(3, 100).shape
+    (100, 3)
     """
+    shells = [np.zeros((1, free_rank), dtype=np.int64)]
+    found = 1
 
-    # Create an empty table using numpy
-    table = np.empty(dims, dtype=complex)
+    # There are no elements of positive norm in Z^0
+    maxnorm_value = 0
+    while found < count and free_rank > 0:
+        maxnorm_value += 1
+        shell = _elements_of_maxnorm_array(free_rank, maxnorm_value)
+        shells.append(shell)
+        found += len(shell)
 
-    # Iterate through the domain and evaluate the function
-    for list_arg in itertools.product(*[range(d) for d in dims]):
-        table[list_arg] = function(list(list_arg),  *args, **kwargs)
+    return np.concatenate(shells)[:count]
 
-    return table
+
+def _elements_of_maxnorm_array(free_rank, maxnorm_value):
+    """
+    Return every element of Z^r such that max_norm(element) = maxnorm_value.
+
+    The elements are in the same order as in
+    :py:func:`~abelian.linalg.free_to_free.elements_of_maxnorm`, where
+    maxnorm_value > 0.
+    """
+    walls = []
+    for wall in range(free_rank):
+
+        # The coordinates before the wall must have reduced boundaries
+        reduced = [np.arange(-maxnorm_value + 1, maxnorm_value)] * wall
+        full = [np.arange(-maxnorm_value, maxnorm_value + 1)]
+        full = full * (free_rank - wall - 1)
+
+        # The cartesian product along the boundaries, in lexicographic order
+        ranges = reduced + full
+        if ranges:
+            grid = np.meshgrid(*ranges, indexing='ij')
+            boundary = np.stack(grid, axis=-1).reshape(-1, len(ranges))
+        else:
+            boundary = np.zeros((1, 0), dtype=np.int64)
+
+        # Every boundary element is on both opposite sides of the hypercube
+        elements = np.empty((len(boundary), 2, free_rank), dtype=np.int64)
+        elements[:, :, :wall] = boundary[:, np.newaxis, :wall]
+        elements[:, 0, wall] = maxnorm_value
+        elements[:, 1, wall] = -maxnorm_value
+        elements[:, :, wall + 1:] = boundary[:, np.newaxis, wall:]
+        walls.append(elements.reshape(-1, free_rank))
+
+    return np.concatenate(walls)
+
+
+def matrix_to_array(matrix):
+    """
+    Convert a sympy Matrix to a two-dimensional numpy array.
+
+    If every entry is an integer, an array of 64-bit integers is returned.
+    If not, an array with dtype `object` is returned, so that exact entries
+    such as rationals are kept for exact arithmetic.
+
+    Parameters
+    ----------
+    matrix : :py:class:`~sympy.matrices.dense.MutableDenseMatrix`
+        A sympy matrix of size m x n.
+
+    Returns
+    -------
+    array : :py:class:`~numpy.ndarray`
+        An array of shape (m, n).
+
+    Examples
+    ---------
+    >>> from sympy import Matrix, Rational
+    >>> array = matrix_to_array(Matrix([[1, 2], [3, 4]]))
+    >>> array.dtype == np.int64
+    True
+    >>> matrix_to_array(Matrix([[Rational(1, 2), 1]])).tolist()
+    [[1/2, 1]]
+    """
+    rows = matrix.tolist()
+    if all(isinstance(entry, (int, Integer)) for row in rows for entry in row):
+        return np.array(rows, dtype=np.int64).reshape(matrix.shape)
+    return np.array(rows, dtype=object).reshape(matrix.shape)
 
 
 def arg(min_or_max, iterable, function_of_element):
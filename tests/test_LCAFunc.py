@@ -1,7 +1,10 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import operator
 import random
+import pytest
+import numpy as np
 from abelian import LCA, LCAFunc, HomLCA, voronoi
 
 
@@ -26,7 +29,273 @@ class TestLCAFunc:
         assert is_close(sigma([0.4, 0.8]), [0, 0.4])
         assert is_close(sigma([0.8, 0.4]), [0.3, -0.2])
 
+    def test_sample_array_matches_sample(self):
+        """
+        Test vectorized sampling against element-wise evaluation.
+        """
+
+        domain = LCA([5, 0, 7])
+        points = [[random.randint(-20, 20) for k in range(3)]
+                  for i in range(25)]
+
+        # The first function accepts arrays, the second one does not
+        vectorizable = LCAFunc(lambda x: x[0] * x[1] + x[2], domain)
+        scalar_only = LCAFunc(lambda x: max(x) - min(x), domain)
+
+        for func in [vectorizable, scalar_only]:
+            expected = [func(p) for p in points]
+            assert func.sample(points) == expected
+            assert func.sample_array(points).tolist() == expected
+
+        # A function reducing over NumPy arrays is sampled element-wise
+        reducing = LCAFunc(lambda x: np.max(np.abs(x)), domain)
+        assert reducing.sample(points) == [reducing(p) for p in points]
+
+    def test_sample_table_after_dft(self):
+        """
+        Test sampling a table on a finite domain against evaluation.
+        """
+
+        domain = LCA([4, 6])
+        points = [[random.randint(-20, 20) for k in range(2)]
+                  for i in range(25)]
+
+        func_dual = LCAFunc(lambda x: x[0] + 2 * x[1], domain).dft()
+        expected = [func_dual(p) for p in points]
+        assert func_dual.sample(points) == expected
+
+        # A table stored by to_table() is not used for sampling
+        func = LCAFunc(lambda x, k=1: k * sum(x), domain)
+        func.to_table(k=10)
+        assert func.sample(points) == [func(p) for p in points]
+        assert all(type(value) == int for value in func.sample(points))
+
+    def test_table_of_reducing_function(self):
+        """
+        Test that a function reducing over NumPy arrays is tabulated
+        element-wise by default.
+        """
+
+        func = LCAFunc(lambda x: np.max(np.abs(x)), LCA([6]))
+        assert func.to_table().tolist() == [0, 1, 2, 3, 4, 5]
+        assert np.allclose(func.dft().to_table(), np.fft.fftn(np.arange(6)))
+
+    def test_dft_of_real_function(self):
+        """
+        Test the DFT of real functions, computed from half the spectrum.
+        """
+
+        for dims in [[5], [6], [5, 4, 3], [3, 1, 4]]:
+            table = np.random.randn(*dims)
+            real_func = LCAFunc(table, LCA(dims))
+            complex_func = LCAFunc(table + 1j * table, LCA(dims))
+
+            assert np.allclose(real_func.dft().to_table(), np.fft.fftn(table))
+            assert np.allclose(real_func.idft().to_table(),
+                               np.fft.ifftn(table))
+            assert np.allclose(complex_func.dft().to_table(),
+                               np.fft.fftn(table + 1j * table))
+
+            # A complex table with zero imaginary part is also real
+            zero_imag_func = LCAFunc(table.astype(complex), LCA(dims))
+            assert np.allclose(zero_imag_func.idft().to_table(),
+                               np.fft.ifftn(table))
+
+    def test_pointwise_tables_against_closure(self):
+        """
+        Test pointwise operations on tables against the element-wise
+        evaluation.
+        """
+
+        domain = LCA([4, 6])
+        elements = [[i, j] for i in range(4) for j in range(6)]
+        table1 = np.random.randint(-9, 9, size=(4, 6))
+        table2 = np.random.randint(1, 9, size=(4, 6))
+        operators = [operator.add, operator.mul, np.maximum,
+                     lambda a, b: max(a, b), lambda a, b: a @ b]
+
+        for op in operators[:4]:
+            func = LCAFunc(table1, domain).pointwise(LCAFunc(table2, domain),
+                                                     op)
+            assert [func(x) for x in elements] == \
+                   [op(table1[tuple(x)], table2[tuple(x)]) for x in elements]
+
+        # A matrix product is not element-wise, the closure is used
+        func = LCAFunc(table1[:4, :4], LCA([4, 4])).pointwise(
+            LCAFunc(table2[:4, :4], LCA([4, 4])), operators[4])
+        assert func.table is None
+
+        # A table stored by to_table() does not change the result
+        lin = LCAFunc(lambda x, k=1: k * (x[0] + x[1]), domain)
+        const = LCAFunc(lambda x, k=1: k, domain)
+        lin.to_table(k=10)
+        const.to_table(k=10)
+        func = lin.pointwise(const, operator.mul)
+        assert func.table is None
+        assert func([1, 2], k=2) == 12
+        assert type(func([1, 2])) == int
+
+    def test_shift_table_against_function(self):
+        """
+        Test shifting a table against shifting a function with the same
+        values.
+        """
+
+        domain = LCA([4, 6])
+        table = np.random.randint(-9, 9, size=(4, 6))
+        from_table = LCAFunc(table, domain)
+        from_function = LCAFunc(lambda x: table[x[0] % 4, x[1] % 6], domain)
+
+        for i in range(10):
+            shift = [random.randint(-20, 20) for k in range(2)]
+            shifted_table = from_table.shift(shift)
+            shifted_function = from_function.shift(shift)
+            for x in [[i, j] for i in range(4) for j in range(6)]:
+                assert shifted_table(x) == shifted_function(x)
+
+        # A table stored by to_table() does not change the shift
+        func = LCAFunc(lambda x: sum(x), LCA([5]))
+        func.to_table()
+        assert func.shift([1])([0]) == -1
+
+    def test_dft_after_grid_dft(self):
+        """
+        Test that a table computed on a grid is not reused by the DFT
+        using pure python.
+        """
+
+        func_expr = lambda x: 1.0 * np.max(np.asarray(x[0]) +
+                                           np.asarray(x[1]))
+        expected = LCAFunc(func_expr, LCA([3, 3])).dft().to_table()
+
+        func = LCAFunc(func_expr, LCA([3, 3]))
+        func.dft(func_type='ogrid')
+        func.idft(func_type='mgrid')
+        assert np.allclose(func.dft().to_table(), expected)
+
+    def test_dft_of_function_real_at_identity(self):
+        """
+        Test the DFT of a complex function which is real at the identity.
+        """
+
+        func = LCAFunc(lambda x: np.exp(1j * np.pi * x[0] / 2) if x[0]
+                       else 1.0, LCA([4]))
+        assert np.allclose(func.dft().to_table(), [0, 4, 0, 0])
+        assert np.allclose(func.idft().to_table(), [0, 0, 0, 1])
+
+    def test_pullback_chain_against_morphisms(self):
+        """
+        Test a chain of pullbacks and shifts against the morphisms.
+        """
+
+        phi = HomLCA([[1, 2], [3, 4]], target=LCA([7, 0]))
+        psi = HomLCA([[2, 0], [0, 1]])
+        func = LCAFunc(lambda x: x[0] - 3 * x[1], LCA([7, 0]))
+        chained = func.pullback(phi).shift([1, 2]).pullback(psi)
+
+        for i in range(25):
+            x = [random.randint(-20, 20) for k in range(2)]
+            y = phi.evaluate([a - b for (a, b) in zip(psi.evaluate(x),
+                                                       [1, 2])])
+            assert chained(x) == func(y)
+
+    def test_pushforward_norm_condition(self):
+        """
+        Test that the norm condition truncates the sum at a max-norm.
+        """
+
+        Z = LCA([0])
+        epimorphism = HomLCA([1], target=LCA([5]))
+        func = LCAFunc(lambda x: 2.0 ** -abs(x[0]), Z)
+
+        # The kernel is 5Z, so the points in the sum are x + 5k. For every
+        # solution x to phi(x) = y with |x| < 5, some point with |k| = 4
+        # satisfies the condition, and no point with |k| = 5 does
+        cond = lambda x: abs(x[0]) <= 20
+        truncated = func.pushforward(epimorphism, 50, norm_condition=cond)
+        nine_terms = func.pushforward(epimorphism, 9)
+
+        for y in range(5):
+            assert abs(truncated([y]) - nine_terms([y])) < 10e-10
+
+            # Compare with the infinite sum, every |x| < 18 is included
+            naive = sum(func([y + 5 * k]) for k in range(-50, 50))
+            assert abs(truncated([y]) - naive) < 2.0 ** -15
+
+        # At most one term uses the solution to phi(x) = y only
+        for terms in [0, 1]:
+            pushforward = func.pushforward(epimorphism, terms)
+            assert pushforward([0]) == 1
+            assert pushforward([1]) == 0.5
+
+        # If the condition is never true, the sum is empty
+        never = func.pushforward(epimorphism, norm_condition=lambda x: False)
+        assert never([2]) == 0
+
+    def test_pushforward_cached_against_naive_sum(self):
+        """
+        Test repeated evaluations of a pushforward against the sum over
+        the preimage of every element.
+        """
+
+        Z = LCA([0])
+        epimorphism = HomLCA([[1, 0], [0, 1]], target=LCA([4, 6]))
+        func = LCAFunc(lambda x: 2.0 ** -(x[0] ** 2 + x[1] ** 2), Z ** 2)
+        pushforward = func.pushforward(epimorphism)
+
+        elements = [[i, j] for i in range(4) for j in range(6)]
+        box = range(-30, 31)
+        for repetition in range(2):
+            for (i, j) in elements:
+                naive = sum(func([a, b]) for a in box for b in box
+                            if (a - i) % 4 == 0 and (b - j) % 6 == 0)
+                assert abs(pushforward([i, j]) - naive) < 10e-10
+
+        # Elements outside the target are projected before the lookup
+        assert pushforward([5, -1]) == pushforward([1, 5])
+
+    def test_pushforward_against_lattice_sum(self):
+        """
+        Test the pushforward along Z^2 -> Z_7 against a sum over the
+        preimage, for a matrix whose solutions are not near the origin.
+        """
+
+        Z = LCA([0])
+        epimorphism = HomLCA([[3, 5]], source=Z ** 2, target=LCA([7]))
+        func = LCAFunc(lambda x: 2.0 ** -(x[0] ** 2 + x[1] ** 2), Z ** 2)
+        pushforward = func.pushforward(epimorphism)
+
+        box = range(-12, 13)
+        for y in range(7):
+            naive = sum(func([a, b]) for a in box for b in box
+                        if (3 * a + 5 * b - y) % 7 == 0)
+            assert abs(pushforward([y]) - naive) < 10e-4
+
+    def test_dft_on_non_discrete_domain(self):
+        """
+        Test that the DFT is not defined on R and T.
+        """
+
+        for domain in [LCA([0], [False]), LCA([1], [False])]:
+            func = LCAFunc(lambda x: 1.0, domain)
+            for transform in [func.dft, func.idft]:
+                with pytest.raises(TypeError):
+                    transform()
+
+    def test_convolve_against_naive_sum(self):
+        """
+        Test the convolution against the definition on Z_4 + Z_3.
+        """
+
+        domain = LCA([4, 3])
+        f = LCAFunc(lambda x: x[0] - 2 * x[1], domain)
+        g = LCAFunc(lambda x: (x[0] * x[1]) % 3 + 1j, domain)
+        convolution = f.convolve(g)
 
+        elements = [[i, j] for i in range(4) for j in range(3)]
+        for x in elements:
+            naive = sum(f(y) * g([x[0] - y[0], x[1] - y[1]]) for y in elements)
+            assert abs(convolution(x) - naive) < 10e-10
 
 
 if __name__ == '__main__':
@@ -16,7 +16,8 @@ from abelian.linalg.free_to_free import free_coimage, free_cokernel, \
     free_image, free_kernel, free_quotient, elements_of_maxnorm_FGA, \
     elements_of_maxnorm
 from abelian.linalg.utils import vector_mod_vector
-from abelian.linalg.free_to_free import mod
+from abelian.linalg.free_to_free import mod, elements_increasing_norm
+from abelian.utils import elements_increasing_norm_array
 
 class TestElementsGeneratorFree:
     """
@@ -62,6 +63,20 @@ class TestElementsGeneratorFree:
         assert all(norm(a)<= norm(b) for a, b in
                    zip(generated[:-1], generated[1:]))
 
+    def test_elements_increasing_norm_array(self):
+        """
+        Verify that the NumPy version yields the same elements in order.
+        """
+
+        # Random parameter values
+        dim = ri(1, 4)
+        count = ri(1, 200)
+
+        generator = elements_increasing_norm(dim)
+        generated = [list(e) for e in itertools.islice(generator, count)]
+
+        assert elements_increasing_norm_array(dim, count).tolist() == generated
+
 
 def naive_FGA_elements_by_norm(orders, maxnorm_value):
     """